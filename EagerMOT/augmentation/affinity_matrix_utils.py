@@ -4,41 +4,35 @@ Utility functions for creating and manipulating affinity matrices
 
 import numpy as np
 
+from augmentation._kernels import blend_affinity
+
 
 def create_affinity_matrix(detections_features, tracklets_features, method_object, class_target: int):
     """
     Create an affinity matrix based on the features of a set of detections and a set of tracklets
     Returns a matrix with detections at rows and tracklets at columns, with the element on row i, column j
     being the similarity score of detection i and tracklet j
-    The returned matrix is also adapted to the EagerMOT score range
+    The returned matrix is also adapted to the EagerMOT score range, with skipped pairs kept at -1
     """
-    matrix = np.zeros((len(detections_features), len(tracklets_features)), dtype=np.float32)
-    for i, element_0 in enumerate(detections_features):
-        for j, element_1 in enumerate(tracklets_features):
-            matrix[i, j] = method_object.evaluate_score(element_0, element_1)
-    # Normalize scores to the EagerMOT range
-    matrix = method_object.get_map_ratio(class_target)*matrix
+    scores, valid = method_object.evaluate_score_matrix(detections_features, tracklets_features)
+    # Normalize valid scores to the EagerMOT range, keep the -1 skip sentinel for the rest
+    matrix = np.where(valid, method_object.get_map_ratio(class_target)*scores, -1).astype(np.float32)
     return matrix
 
 
 def concatenate_matrices(matrix_0, matrix_1, bias_ratio=0.5):
     """
     Take in two matrices and concatenate them by elementwise addition.
-    Only concatenates when the element in matrix_1 is nonnegative: negative values signal that the augmentation
-    method is invalid for that element.
+    Keeps the EagerMOT score unchanged where matrix_1 holds the -1 skip sentinel, signalling that the augmentation
+    method is invalid for that element, and concatenates everywhere else.
     (For instance a detection i paired with a tracklet j, where the tracklet does not have a feature vector)
     First, matrix_1 is unnormalized to have values in the same range as matrix_0, then the concatenation is done:
     conc_matrix[i, j] = matrix_0[i, j]*bias_ratio + matrix_1[i, j]*(1-bias_ratio)
     Expects bias_ratio in the interval [0, 1]
+    The elementwise loop is JIT-compiled in augmentation._kernels when numba is available
     """
     if not matrix_0.shape == matrix_1.shape:
         # Non-matching matrix dimensions
         return matrix_0
     #matrix_1 = unnormalize_matrix(matrix_0, matrix_1)
-    dims = np.shape(matrix_0)
-    conc_matrix = matrix_0.copy()
-    for i in range(dims[0]):
-        for j in range(dims[1]):
-            if matrix_1[i, j] < 0:
-                conc_matrix[i, j] = matrix_0[i, j]*bias_ratio + matrix_1[i, j]*(1-bias_ratio)
-    return conc_matrix
+    return blend_affinity(matrix_0, matrix_1, bias_ratio)
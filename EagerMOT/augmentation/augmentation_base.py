@@ -30,28 +30,56 @@ represents a feature vector to be used in reidentification.
                                       and -1 -> this pair is skipped in concatenation, and the original EagerMOT score
                                                 for the pair is kept unchanged
 
+ Additionally, a child class MAY override:
+ * get_features_soa(self, detected_instances, tracks), which returns the same features as get_features but packed
+        into contiguous float32 buffers (structure-of-arrays): a (detections, feature length) matrix plus validity
+        mask for the detections, and one concatenated (total history length, feature length) matrix plus a CSR-style
+        offsets vector for the tracklet histories. The default implementation packs the output of get_features.
+ * evaluate_score_matrix(self, det_features, track_features), which evaluates all detection-tracklet pairs in one call
+        and should return:
+            - A float32 matrix of shape (detections, tracklets) with the score of each pair
+            - A boolean matrix of the same shape, where False marks pairs to be skipped in concatenation
+        The default implementation loops over evaluate_score, so overriding is only needed when the scores can be
+        computed in a vectorized fashion (one numpy call instead of one Python call per pair).
+
 Finally, in the same file as the child class definition, but outside the class, there should be a function
-create_child_object(method_name: str, automatic_init: bool) which returns an instance of the child class.
+create_child_object(method_name: str, automatic_init: bool, eagermot_thresholds: dict, config: dict = None)
+which returns an instance of the child class. The optional config dictionary carries pre-supplied values for the
+prompted settings ("folder" and "bias_ratio"), so that batch runs can construct methods without blocking on stdin.
 
 This creation should be added to the function create_child_class_object at the end of this file.
 
 """
 
-from os import path
+from os import path, stat
 from json import dump
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
 # Define name macros of implemented augmentation methods in configs/local_parameters.py and import them here
 from configs.local_variables import MOUNT_PATH
 from augmentation.augmentation_params import VISUAL_SIM_NAME, augmentation_methods, default_settings
 import augmentation.augmentation_base_utils as utils_aug
+import augmentation._kernels as kernels
 
 
 class AugmentationMethod(ABC):
-    def __init__(self, method_name: str, automatic_init: bool, eagermot_thresholds: dict):
+    def __init__(self, method_name: str, automatic_init: bool, eagermot_thresholds: dict, config: dict = None):
         self.name = method_name
         self.map_ratio = self.setup_map_ratio(eagermot_thresholds)
-        if automatic_init:
+        if config is not None:
+            # Pre-supplied configuration, e.g. for batch runs sweeping over bias ratios:
+            # skip both the default settings and the interactive prompts
+            self.folder = config["folder"]
+            self.bias_ratio = config["bias_ratio"]
+        elif automatic_init:
             self.folder = default_settings["folder"]
             self.bias_ratio = default_settings["bias ratio"]
         else:
@@ -61,6 +89,14 @@ class AugmentationMethod(ABC):
     def get_name(self):
         return self.name
 
+    def is_active(self):
+        """
+        Whether this method contributes to the affinity matrices at all: with bias_ratio == 1
+        the augmented matrix would be discarded at concatenation, so the framework can skip
+        feature extraction and score evaluation entirely.
+        """
+        return self.bias_ratio < 1
+
     def get_folder(self):
         return self.folder
 
@@ -70,6 +106,13 @@ class AugmentationMethod(ABC):
     def get_map_ratio(self, class_target: int):
         return self.map_ratio[class_target]
 
+    def get_map_ratios(self, class_targets: np.ndarray):
+        """
+        Vectorized counterpart of get_map_ratio: gathers the map ratios of a whole vector of
+        class ids with a single array indexing operation
+        """
+        return self.map_ratio[class_targets]
+
     def get_source_folder_address(self):
         default_path = MOUNT_PATH + "/Embeddings/" + self.name + "/"
         print("The default folder is " + default_path)
@@ -80,7 +123,12 @@ class AugmentationMethod(ABC):
             while True:
                 userpath = str(input(MOUNT_PATH))
                 custom_folder_addr = MOUNT_PATH + userpath
-                if not path.exists(custom_folder_addr):
+                try:
+                    # One stat syscall instead of path.exists, which stats internally;
+                    # embedding folders may live on networked mounts where each stat is a round trip.
+                    # Any OSError (missing folder, permissions, flaky mount) re-prompts, like path.exists did
+                    stat(custom_folder_addr)
+                except OSError:
                     print("Error: folder does not exist. Input again")
                     continue
                 # return user chosen folder path
@@ -89,10 +137,7 @@ class AugmentationMethod(ABC):
             return default_path
 
     def get_bias_ratio_input(self):
-        headerstring = " EagerMOT"
-        for i in range(25 - len(self.name)):
-            headerstring += " "
-        headerstring += self.name
+        headerstring = " EagerMOT" + self.name.rjust(25)
         print("Insert bias ratio in the range [0, 1]:\n" + headerstring + "\n 1 ----------------------------- 0")
         while True:
             try:
@@ -111,38 +156,83 @@ class AugmentationMethod(ABC):
     def save_augmentation_parameters(self, save_path: str):
         raise NotImplementedError("The child class must override save_augmentation_parameters!")
 
+    def write_parameters_file(self, params_to_write: dict, params_file: str):
+        """
+        Serialize a parameter dictionary to a .json file, shared by the save_augmentation_parameters
+        overrides of the child classes.
+        Uses the C-implemented orjson encoder with a single buffered write when orjson is installed,
+        and falls back to the stdlib json module otherwise.
+        """
+        if _ORJSON_AVAILABLE:
+            with open(params_file, 'wb') as f:
+                f.write(orjson.dumps(params_to_write, option=orjson.OPT_INDENT_2))
+        else:
+            with open(params_file, 'w') as f:
+                dump(params_to_write, f, indent=4)
+
     @abstractmethod
     def setup_map_ratio(self, eagermot_thresholds: dict):
+        """
+        Should return a float32 numpy array indexed by the (small, dense) integer class ids,
+        so map ratios can be gathered for whole vectors of class ids at once
+        """
         raise NotImplementedError("The child class must override setup_map_ratio!")
 
     @abstractmethod
     def get_features(self, detected_instances, tracks):
         raise NotImplementedError("The child class must override get_features!")
 
+    def get_features_soa(self, detected_instances, tracks):
+        """
+        Structure-of-arrays counterpart of get_features: returns the features packed into contiguous
+        float32 buffers (see utils_aug.pack_features_soa for the exact layout), so that scoring can
+        slice matrices instead of iterating Python lists.
+        """
+        det_features, track_features = self.get_features(detected_instances, tracks)
+        return utils_aug.pack_features_soa(det_features, track_features)
+
     @abstractmethod
     def evaluate_score(self, element_0, element_1):
         raise NotImplementedError("The child class must override evaluate_score!")
 
+    def evaluate_score_matrix(self, det_features, track_features):
+        """
+        Evaluate the scores of all detection-tracklet pairs in one call.
+        Returns:
+        * a float32 matrix of shape (detections, tracklets) with the score of each pair
+        * a boolean matrix of the same shape, where False marks pairs to be skipped in concatenation
+          (the -1 sentinel of evaluate_score)
+        This default implementation falls back to one evaluate_score call per pair, so child classes
+        only need to override it when they can compute the matrix in a vectorized fashion.
+        """
+        scores = np.zeros((len(det_features), len(track_features)), dtype=np.float32)
+        for i, element_0 in enumerate(det_features):
+            for j, element_1 in enumerate(track_features):
+                scores[i, j] = self.evaluate_score(element_0, element_1)
+        return scores, scores != -1
+
 
 class DoNotAugment(AugmentationMethod):
     """
     Dummy child class for not augmenting EagerMOT.
-    Having self.name = DoNotAugment means the augmentation isn't performed.
+    Overriding is_active to False means the augmentation isn't performed.
     """
     def __init__(self, eagermot_thresholds: dict):
         super().__init__('DoNotAugment', True, eagermot_thresholds)
 
+    def is_active(self):
+        return False
+
     def setup_map_ratio(self, eagermot_thresholds: dict):
-        return eagermot_thresholds
+        map_ratio_per_class = np.ones(max(eagermot_thresholds) + 1, dtype=np.float32)
+        for key, threshold in eagermot_thresholds.items():
+            map_ratio_per_class[key] = threshold
+        return map_ratio_per_class
 
     def save_augmentation_parameters(self, save_path: str):
         params_to_write = {"None": None}
         params_file = path.join(save_path, "No_augmentation_used.json")
-        with open(params_file, 'w') as f:
-            dump(params_to_write, f, indent=4)
-
-    def get_name(self):
-        return False
+        self.write_parameters_file(params_to_write, params_file)
 
     def get_features(self, detected_instances, tracks):
         pass
@@ -151,16 +241,18 @@ class DoNotAugment(AugmentationMethod):
         pass
 
 
-def init_augment(automatic_init: bool, eagermot_thresholds: dict):
+def init_augment(automatic_init: bool, eagermot_thresholds: dict, config: dict = None):
     """
     Initiate augmentation, either automatically with the default method, with the user's choice,
     or with the DoNotAugment dummy class if the user declines augmentation.
+    A config dictionary with "folder" and "bias_ratio" entries can be forwarded to skip the
+    corresponding prompts, e.g. when sweeping over bias ratios in batch runs.
     """
-    if automatic_init:
+    if config is not None or automatic_init:
         default_method_identifier = default_settings['method']
         default_method_name = default_settings['name']
         return create_child_class_object(default_method_identifier, default_method_name, automatic_init,
-                                         eagermot_thresholds)
+                                         eagermot_thresholds, config)
     print("Would you like to augment EagerMOT by concatenating the EagerMOT "
           "affinity matrix with one based on data from another method? [y/n]")
     savechoice = str(input())
@@ -169,13 +261,28 @@ def init_augment(automatic_init: bool, eagermot_thresholds: dict):
         chosen_method_identifier = augmentation_methods[choice_num][2]
         chosen_method_name =  augmentation_methods[choice_num][0]
         return create_child_class_object(chosen_method_identifier, chosen_method_name, automatic_init,
-                                         eagermot_thresholds)
+                                         eagermot_thresholds, config)
     else:
         return DoNotAugment(eagermot_thresholds)
 
 
-def create_child_class_object(method_identifier: str, name: str, automatic_init: bool, eagermot_thresholds: dict):
-    if method_identifier == "vis_sim_2d":
-        from augmentation.visual_similarity_2d import create_child_object
-    return create_child_object(name, automatic_init, eagermot_thresholds)
+# Cache of the create_child_object function of each method identifier, populated lazily,
+# so that repeated dispatches do not re-run the import machinery
+_child_object_creators = {}
+
+
+def _get_child_object_creator(method_identifier: str):
+    creator = _child_object_creators.get(method_identifier)
+    if creator is None:
+        if method_identifier == "vis_sim_2d":
+            from augmentation.visual_similarity_2d import create_child_object as creator
+        _child_object_creators[method_identifier] = creator
+    return creator
+
+
+def create_child_class_object(method_identifier: str, name: str, automatic_init: bool, eagermot_thresholds: dict,
+                              config: dict = None):
+    # Compile the affinity blending kernel now, instead of during the first tracked frame
+    kernels.warmup_blend_affinity()
+    return _get_child_object_creator(method_identifier)(name, automatic_init, eagermot_thresholds, config)
 
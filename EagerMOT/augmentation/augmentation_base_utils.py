@@ -4,6 +4,42 @@ Utility functions for augmentation
 
 from os import path, makedirs
 
+import numpy as np
+
+
+def pack_features_soa(det_features, track_features):
+    """
+    Pack per-object feature vectors (array-of-structures) into contiguous float32 buffers
+    (structure-of-arrays), so scoring can be done with matrix operations instead of walking
+    Python lists.
+    In-arguments are the two lists returned by get_features, where missing features are None.
+    Returns:
+    * det_matrix: (detections, feature length) float32 matrix, with zero rows for detections
+      without a feature vector
+    * det_valid: boolean vector marking which detections have a feature vector
+    * track_matrix: (total history length, feature length) float32 matrix of all tracklet
+      feature vector histories concatenated back to back
+    * track_offsets: integer vector of length tracklets+1 such that
+      track_matrix[track_offsets[t]:track_offsets[t+1]] is the history of tracklet t
+      (CSR-style); an empty slice marks a tracklet without a history
+    """
+    det_valid = np.array([bool(feature_vector) for feature_vector in det_features], dtype=bool)
+    stacked_dets = [np.asarray(feature_vector, dtype=np.float32)
+                    for feature_vector in det_features if feature_vector]
+    feature_length = stacked_dets[0].shape[0] if stacked_dets else 0
+    det_matrix = np.zeros((len(det_features), feature_length), dtype=np.float32)
+    if stacked_dets:
+        det_matrix[det_valid] = np.stack(stacked_dets)
+    track_lengths = [len(history) if history else 0 for history in track_features]
+    track_offsets = np.cumsum([0] + track_lengths)
+    stacked_histories = [np.asarray(history, dtype=np.float32)
+                         for history in track_features if history]
+    if stacked_histories:
+        track_matrix = np.ascontiguousarray(np.concatenate(stacked_histories))
+    else:
+        track_matrix = np.zeros((0, feature_length), dtype=np.float32)
+    return det_matrix, det_valid, track_matrix, track_offsets
+
 def get_generic_folder(default_path: str, query: str, prompt: str, create: bool):
     print(query + " [y/n]")
     savechoice = str(input())
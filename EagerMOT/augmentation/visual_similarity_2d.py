@@ -15,7 +15,8 @@ feature vector.
 """
 
 from os import path
-from json import dump
+
+import numpy as np
 
 from augmentation.augmentation_params import default_settings, VISUAL_SIM_NAME, VIS_SIM_2D_THRESHOLDS
 from augmentation.augmentation_base import AugmentationMethod
@@ -24,24 +25,29 @@ import augmentation.visual_similarity_2d_utils as utils_vis_2d
 
 
 class AugMet_Vis_Sim_2D(AugmentationMethod):
-    def __init__(self, method_name: str, automatic_init: bool, eagermot_thresholds: dict):
-        super().__init__(method_name, automatic_init, eagermot_thresholds)
-        if automatic_init:
+    def __init__(self, method_name: str, automatic_init: bool, eagermot_thresholds: dict, config: dict = None):
+        super().__init__(method_name, automatic_init, eagermot_thresholds, config)
+        if config is not None or automatic_init:
             self.n = default_settings["n"]
             self.history_name = utils_vis_2d.history_functions[default_settings["history function"]][0]
             self.similarity_name = utils_vis_2d.similarity_functions[default_settings["similarity function"]][0]
             self.history_function = utils_vis_2d.history_functions[default_settings["history function"]][2]
             self.similarity_function = \
                 utils_vis_2d.similarity_functions[default_settings["similarity function"]][2]
+            self.history_matrix_function = utils_vis_2d.history_functions[default_settings["history function"]][3]
+            self.similarity_matrix_function = \
+                utils_vis_2d.similarity_functions[default_settings["similarity function"]][3]
         else:
             self.n = None
             self.history_name = None
             self.similarity_name = None
+            self.history_matrix_function = None
+            self.similarity_matrix_function = None
             self.history_function = self.get_history_function(utils_vis_2d.history_functions)
             self.similarity_function = self.get_similarity_function(utils_vis_2d.similarity_functions)
 
     def setup_map_ratio(self, thresholds_eagermot: dict):
-        map_ratio_per_class = {}
+        map_ratio_per_class = np.ones(max(thresholds_eagermot) + 1, dtype=np.float32)
         for key in thresholds_eagermot:
             try:
                 adapted_threshold_vis_sim_2d = utils_aug.adapt_normalized_score(VIS_SIM_2D_THRESHOLDS[key])
@@ -58,11 +64,13 @@ class AugMet_Vis_Sim_2D(AugmentationMethod):
             self.history_name = history_functions[history_value][0]
         else:
             self.history_name = history_functions[history_value][0]
+        self.history_matrix_function = history_functions[history_value][3]
         return history_functions[history_value][2]
 
     def get_similarity_function(self, similarity_functions):
         similarity_choice = utils_aug.choose_hyper_parameter(similarity_functions)
         self.similarity_name = similarity_functions[similarity_choice][0]
+        self.similarity_matrix_function = similarity_functions[similarity_choice][3]
         return similarity_functions[similarity_choice][2]
 
     def get_features(self, detected_instances, tracks):
@@ -91,6 +99,30 @@ class AugMet_Vis_Sim_2D(AugmentationMethod):
         else:
             return -1
 
+    def evaluate_score_matrix(self, det_features, track_features):
+        """
+        Vectorized override of evaluate_score: stacks the detection feature vectors and the tracklet
+        feature vector histories into contiguous float32 matrices and evaluates all individual
+        similarities with one matrix similarity call, then reduces each tracklet's history block
+        with the vectorized history function.
+        Falls back to the per-pair parent implementation if the chosen similarity or history function
+        has no vectorized counterpart.
+        """
+        if self.similarity_matrix_function is None or self.history_matrix_function is None:
+            return super().evaluate_score_matrix(det_features, track_features)
+        scores = np.full((len(det_features), len(track_features)), -1, dtype=np.float32)
+        det_matrix, det_valid, history_matrix, track_offsets = \
+            utils_aug.pack_features_soa(det_features, track_features)
+        if det_valid.any() and history_matrix.shape[0] > 0:
+            similarity_matrix = self.similarity_matrix_function(det_matrix[det_valid], history_matrix)
+            det_rows = np.flatnonzero(det_valid)
+            for j in range(len(track_features)):
+                if track_offsets[j] == track_offsets[j+1]:
+                    continue
+                history_block = similarity_matrix[:, track_offsets[j]:track_offsets[j+1]]
+                scores[det_rows, j] = self.history_matrix_function(history_block, self.n)
+        return scores, scores != -1
+
     def save_augmentation_parameters(self, save_path: str):
         params_to_write = {"Hyperparameters": {"Bias ratio": self.bias_ratio,
                                                "Similarity function": self.similarity_name,
@@ -104,9 +136,8 @@ class AugMet_Vis_Sim_2D(AugmentationMethod):
                                                 "Trailer": VIS_SIM_2D_THRESHOLDS[6],
                                                 "Truck": VIS_SIM_2D_THRESHOLDS[7]}}
         params_file = path.join(save_path, (VISUAL_SIM_NAME + "_parameters.json"))
-        with open(params_file, 'w') as f:
-            dump(params_to_write, f, indent=4)
+        self.write_parameters_file(params_to_write, params_file)
 
 
-def create_child_object(method_name: str, automatic_init: bool, eagermot_thresholds: dict):
-    return AugMet_Vis_Sim_2D(method_name, automatic_init, eagermot_thresholds)
+def create_child_object(method_name: str, automatic_init: bool, eagermot_thresholds: dict, config: dict = None):
+    return AugMet_Vis_Sim_2D(method_name, automatic_init, eagermot_thresholds, config)
@@ -18,9 +18,21 @@ def cosine_similarity(feature_vector_0, feature_vector_1) -> float:
     return adapt_normalized_score(cos_sim_norm)
 
 
-# Once implemented, similarity functions should be added in this dictionary
+def cosine_similarity_matrix(feature_matrix_0, feature_matrix_1):
+    """
+    Vectorized counterpart of cosine_similarity: takes two stacked feature matrices of shapes (d, f) and (h, f)
+    and returns the (d, h) matrix of normalized cosine distances with a single matrix product
+    """
+    fm_0 = feature_matrix_0 / norm(feature_matrix_0, axis=1, keepdims=True)
+    fm_1 = feature_matrix_1 / norm(feature_matrix_1, axis=1, keepdims=True)
+    cos_sim_norm = (1 + fm_0 @ fm_1.T) / 2
+    return adapt_normalized_score(cos_sim_norm)
+
+
+# Once implemented, similarity functions should be added in this dictionary, with the vectorized
+# matrix counterpart (or None) as the fourth element
 similarity_functions = {'Type': "similarity function",
-                   1: ["Cosine similarity score", False, cosine_similarity]}
+                   1: ["Cosine similarity score", False, cosine_similarity, cosine_similarity_matrix]}
 
 
 def history_equal_weight(element_0, element_1, similarity_function, n):
@@ -75,16 +87,61 @@ def history_last_only(element_0, element_1, similarity_function, n):
     return similarity_function(element_0, element_1[-1])
 
 
-# Once implemented, history methods should be added in this dictionary
+def history_equal_weight_matrix(similarity_block, n):
+    """
+    Vectorized counterpart of history_equal_weight, taking the (detections, history length) block of
+    individual similarity scores for one tracklet and returning one score per detection
+    """
+    return similarity_block.mean(axis=1)
+
+
+def history_n_last_equal_weight_matrix(similarity_block, n):
+    """
+    Vectorized counterpart of history_n_last_equal_weight
+    """
+    all_count = similarity_block.shape[1]
+    if all_count < n:
+        n = all_count
+    return similarity_block[:, -n:].mean(axis=1)
+
+
+def history_n_last_diff_weights_matrix(similarity_block, n):
+    """
+    Vectorized counterpart of history_n_last_diff_weights
+    """
+    all_count = similarity_block.shape[1]
+    if all_count < n:
+        n = all_count
+    weights = np.empty(n, dtype=np.float32)
+    weight = 0.5
+    accum_weight = 0
+    for k in range(n-1):
+        weights[k] = 1 / weight
+        accum_weight += weight
+        weight /= 2
+    weights[n-1] = 1 / (1 - accum_weight)
+    # Reverse the columns so that weights line up with the most recent feature vectors first
+    return similarity_block[:, ::-1][:, :n] @ weights
+
+
+def history_last_only_matrix(similarity_block, n):
+    """
+    Vectorized counterpart of history_last_only
+    """
+    return similarity_block[:, -1]
+
+
+# Once implemented, history methods should be added in this dictionary, with the vectorized
+# matrix counterpart (or None) as the fourth element
 history_functions = {'Type': "method for handling the feature vector history of a tracklet",
                      1: ["Equal weight for all feature vectors", False,
-                         history_equal_weight],
+                         history_equal_weight, history_equal_weight_matrix],
                      2: ["Equal weight for the n most recent feature vectors", False,
-                         history_n_last_equal_weight],
+                         history_n_last_equal_weight, history_n_last_equal_weight_matrix],
                      3: ["The n most recent feature vectors, with weight 1/2, 1/4, 1/8 etc", False,
-                         history_n_last_diff_weights],
+                         history_n_last_diff_weights, history_n_last_diff_weights_matrix],
                      4: ["Only consider the most recent feature vector", False,
-                         history_last_only]}
+                         history_last_only, history_last_only_matrix]}
 
 
 def setup_n():
@@ -56,8 +56,9 @@ def associate_instances_to_tracks_3d_iou(detected_instances, tracks, params: Map
         matrix_3d_sim = distance_2d_full_matrix(detected_coordinates, track_coordinates)
         matrix_3d_sim *= -1
     # ------------ Altered code -----------------------------------------------------------
-    # Check if augmenting
-    if params['augment'].get_name():
+    # Check if augmenting: skips feature extraction and scoring entirely when the augmented
+    # matrix would be discarded at concatenation anyway
+    if params['augment'].is_active():
         # Extract features
         detections_feature_vectors, tracks_feature_vectors_histories = \
                                                      params['augment'].get_features(detected_instances, tracks)